@@ -6,7 +6,7 @@
 """Read and write Teac TAFFmat files.
 
 The .dat file is read into a numpy array.
-The .hdr file is read into an OrderedDict
+The .hdr file is read into a dict with the fields in the .hdr file order.
 
 Per the Teac LX-10 Instruction Manual, the A/D-converted data
 is recored as 2-byte integers from -32,768 to +32,767. Negative
@@ -45,66 +45,391 @@ level is approximately +/-120%." [Source p. 4-5 of Teac manual]
 """
 
 # Standard module imports
-from collections import OrderedDict
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+import stat
 
 # Data analysis related imports
 import numpy as np
 
-__version__ = '1.0.1'
-
+# Optional imports. numba takes several times longer to import than
+# taffmat itself, so it's only imported on the first conversion (see
+# _import_accelerators). Until then it's _NOT_IMPORTED, and afterwards
+# the module or None if it isn't installed.
+_NOT_IMPORTED = object()
+numba = _NOT_IMPORTED
 
-def _append_windows_newlines(input_list_of_strings):
-    '''Append Windows style newlines to list of strings.
+__version__ = '1.0.1'
 
-    Takes a list of strings and replaces UNIX style line endings with
-    Windows style line endings \\r\\n.
+# Number of samples converted per tile by the numpy conversion paths. A tile
+# of int16 input plus its float64 output for a handful of series fits in
+# L2, so the interleaved .dat samples are only pulled from memory once.
+_TILE_NUM_SAMPLES = 8192
+
+# Smallest .dat file (in bytes) that read_taffmat(..., use_memmap=False)
+# reads in a background thread while the .hdr file is being parsed. For
+# smaller files starting the thread costs more than it saves.
+_BACKGROUND_READ_MIN_BYTES = 1 << 20
+
+# Layout of the .hdr file. The trailing spaces on some lines match the
+# files written by the data recorders.
+_HDR_TEMPLATE = (
+    'DATASET {dataset}\n'
+    'VERSION {version}\n'
+    'SERIES {series_labels} \n'
+    'DATE {date}\n'
+    'TIME {time}\n'
+    'RATE {sampling_frequency_hz}\n'
+    'VERT_UNITS {vertical_units} \n'
+    'HORZ_UNITS {horizontal_units}\n'
+    'COMMENT {comment}\n'
+    'NUM_SERIES {number_of_series}\n'
+    'STORAGE_MODE {storage_mode}\n'
+    'FILE_TYPE {file_type}\n'
+    'SLOPE {slope} \n'
+    'X_OFFSET {x_offset:1.1f}\n'
+    'Y_OFFSET {y_offset} \n'
+    'NUM_SAMPS {number_of_samples}\n'
+    'DATA\n'
+    'DEVICE {device}\n'
+    'SLOT1_AMP {slot1_amp}\n'
+    'SLOT2_AMP {slot2_amp}\n'
+    '{channel_lines}'
+    'ID_NO {id_num}\n'
+    'TIME {start_time},{stop_time}\n'
+    'REC_MODE {recording_destination} \n'
+    'START_TRIGGER {start_trigger}  \n'
+    'STOP_CONDITION {stop_condition}  \n'
+    'ID_END\n'
+    '{voice_memo_line}'
+    '{recorder_model}_VERSION {recorder_version}\n'
+    'MEMO_LENGTH {memo_length}\n'
+    'MEMO {memo}\n'
+    '\n'
+)
+
+# Amplifier in a slot of the recorder (SLOT1_AMP and SLOT2_AMP lines)
+_AmpInfo = namedtuple(
+    'AmpInfo', 'id_name num_of_channels pld_version firmware_version')
+
+# Amplifier settings of a channel (CHn_n lines)
+_ChannelInfo = namedtuple(
+    'ChannelInfo', 'channel_num amp_type range_setting filter_setting')
+
+
+def _parse_hdr_list(raw_value):
+    '''Split a comma separated .hdr value (one entry per series)'''
+    return raw_value.split(',')
+
+
+def _parse_hdr_float64_array(raw_value):
+    '''Parse a comma separated numeric .hdr value into a float64 ndarray'''
+    return np.fromstring(raw_value, dtype=np.float64, sep=',')
+
+
+def _parse_hdr_datetime(raw_value):
+    '''Parse the joined DATE and TIME .hdr values into a datetime'''
+    return datetime.strptime(raw_value, '%m-%d-%Y %H:%M:%S.%f')
+
+
+# .hdr fields that are converted straight into header_data, in the order
+# of the .hdr file (which is also the order of header_data).
+# Each entry is (raw .hdr key, header_data key, converter).
+_HDR_FIELDS = (
+    ('dataset', 'dataset', str),
+    ('version', 'version', int),
+    ('series', 'series_labels', _parse_hdr_list),
+    # The DATE and TIME lines joined by _read_taffmat_hdr
+    ('date_time', 'recording_start_datetime', _parse_hdr_datetime),
+    ('rate', 'sampling_frequency_hz', int),
+    ('vert_units', 'vertical_units', _parse_hdr_list),
+    ('horz_units', 'horizontal_units', str),
+    ('comment', 'comment', str),
+    ('num_series', 'number_of_series', int),
+    ('storage_mode', 'storage_mode', str),
+    # The file_type lists how the data was recorded and saved in .dat
+    # INTEGER = 16 bit A/D = 2-byte integers
+    # LONG = 24 bit A/D = 4-byte integers
+    ('file_type', 'file_type', str),
+    ('slope', 'slope', _parse_hdr_float64_array),
+    ('x_offset', 'x_offset', float),
+    ('y_offset', 'y_offset', _parse_hdr_float64_array),
+    ('num_samps', 'number_of_samples', int),
+    # The .hdr file will have a row containing just "DATA" to indicate
+    # that the entries here on are proprietary to the data recorder.
+    # Prior to this point, the header file was in the DADiSP format.
+    ('device', 'device', str),
+)
 
-    Args:
-        input_list_of_strings: A list of strings.
 
-    Returns:
-        A list of strings with Windows newline characters \\r\\n.
+def _check_slope_and_offset(data_array, slope, y_offset):
+    '''Raise a ValueError unless there's one slope and y_offset per series
 
-    Raies:
-        N/A
+    The conversion kernels index slope and y_offset by series without
+    bounds checks, so this has to be checked before calling them.
     '''
-    windows_newline_character = '\r\n'
-    output_list_of_strings = []
-    for line in input_list_of_strings:
-        output_list_of_strings.append(line + windows_newline_character)
+    number_of_series = data_array.shape[0]
+    if len(slope) != number_of_series or len(y_offset) != number_of_series:
+        raise ValueError(
+            'slope and y_offset must have one value for each of the '
+            '{number_of_series} series'.format(
+                number_of_series=number_of_series))
 
-    return output_list_of_strings
 
+def _as_float64_vector(values):
+    '''Return the per-series values (e.g., slope) as a float64 ndarray
 
-def _apply_slope_and_offset(data_array, number_of_series, slope, y_offset):
+    The slope and y_offset in header_data are already float64 ndarrays,
+    in which case they are returned as-is without a copy.
+    '''
+    return np.asarray(values, dtype=np.float64).reshape(-1)
+
+
+# The numba conversion kernels. They're plain Python loops here and are
+# JIT compiled by _import_accelerators when numba is installed. They're
+# deliberately not parallel=True: the conversion is memory bound anyway,
+# and numba's default workqueue threading layer aborts the process when
+# parallel kernels are called from several threads. As plain serial
+# kernels that release the GIL, they're safe to call concurrently (e.g.,
+# reading several files from a thread pool).
+# The samples are walked one by one, i.e. in the interleaved order of the
+# .dat file and of the Fortran ordered arrays, so memory is read and
+# written sequentially. That already touches each cache line once, so
+# unlike the numpy path the kernels aren't tiled.
+# fastmath is deliberately left off: contracting the multiply-add into an
+# FMA changes the last bit of the result, which would break bit-exact
+# round trips through the .dat file.
+def _apply_slope_and_offset_loop(data_array, slope, y_offset, output_array):
+    number_of_series, number_of_samples = data_array.shape
+    for sample in range(number_of_samples):
+        for series in range(number_of_series):
+            output_array[series, sample] = (
+                data_array[series, sample] * slope[series] +
+                y_offset[series])
+
+
+def _remove_slope_and_offset_loop(data_array, slope, y_offset, output_array):
+    number_of_series, number_of_samples = data_array.shape
+    for sample in range(number_of_samples):
+        for series in range(number_of_series):
+            output_array[series, sample] = np.int16(np.rint(
+                (data_array[series, sample] - y_offset[series]) /
+                slope[series]))
+
+
+# The compiled kernels, set by _import_accelerators
+_apply_slope_and_offset_kernel = None
+_remove_slope_and_offset_kernel = None
+
+
+def _import_accelerators():
+    '''Import numba, if installed, on the first conversion
+
+    The numba kernels are compiled lazily on their first call and cached
+    on disk, so only the very first conversion in an environment pays
+    for the JIT compilation. The kernels are set up before numba itself
+    is published, so concurrent first calls never see numba without its
+    kernels.
+    '''
+    global numba
+    global _apply_slope_and_offset_kernel, _remove_slope_and_offset_kernel
+    if numba is _NOT_IMPORTED:
+        try:
+            import numba as numba_module
+        except ImportError:
+            numba_module = None
+        if numba_module is not None:
+            jit = numba_module.njit(nogil=True, cache=True)
+            _apply_slope_and_offset_kernel = jit(
+                _apply_slope_and_offset_loop)
+            _remove_slope_and_offset_kernel = jit(
+                _remove_slope_and_offset_loop)
+        numba = numba_module
+
+
+def _apply_slope_and_offset(data_array, number_of_series, slope, y_offset,
+                            out=None, dtype=np.float64):
     """
-    Convert from int16 to float64 and apply the slope and offset
-    so the data_array contains the measured values.
+    Convert from int16 to float64 (or the given floating point dtype)
+    and apply the slope and offset so the data_array contains the
+    measured values.
+
+    The number of series is taken from data_array, so number_of_series
+    is only kept for backwards compatibility.
+
+    If given, out is an ndarray of the given dtype with the same shape as
+    data_array that the measured values are written into (e.g., to reuse
+    a single buffer across many equally sized files). Otherwise a new
+    array is allocated in Fortran order, so that like the .dat file it is
+    stored sample by sample and the conversion streams through both
+    arrays without striding.
+
+    The multiply-add is always evaluated in float64 and only rounded to
+    dtype when stored. A float32 result is within half a float32 ULP of
+    the float64 one, which is well below the noise floor of the 16-bit
+    ADC, and halves the memory traffic of any downstream processing.
     """
-    data_array = data_array.astype(np.float64)
-    for series in range(0, number_of_series):
-        data_array[series] = (data_array[series] * slope[series] +
-                              y_offset[series])
-
-    return data_array
-
+    slope = _as_float64_vector(slope)
+    y_offset = _as_float64_vector(y_offset)
+    _check_slope_and_offset(data_array, slope, y_offset)
+    _import_accelerators()
+
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise ValueError('dtype must be a floating point type')
+    if out is None:
+        output_array = np.empty(data_array.shape, dtype=dtype, order='F')
+    elif out.shape != data_array.shape or out.dtype != dtype:
+        raise ValueError(
+            'out must be a {dtype} array with shape {shape}'.format(
+                dtype=dtype, shape=data_array.shape))
+    else:
+        output_array = out
+
+    if numba is not None:
+        _apply_slope_and_offset_kernel(
+            data_array, slope, y_offset, output_array)
+        return output_array
+
+    # Convert one tile of samples at a time so the add reuses the product
+    # while it is still in cache. Each tile is handled as a flat,
+    # interleaved (sample by sample) vector against the slope and
+    # y_offset repeated once per sample, so numpy's inner loop runs over
+    # the whole tile rather than over just the few series that a
+    # broadcast (series, 1) column would give it.
+    slope_tile = np.tile(slope, _TILE_NUM_SAMPLES)
+    y_offset_tile = np.tile(y_offset, _TILE_NUM_SAMPLES)
+    scratch_array = np.empty(slope_tile.shape, dtype=np.float64)
+    for first_sample in range(0, data_array.shape[1], _TILE_NUM_SAMPLES):
+        end_sample = first_sample + _TILE_NUM_SAMPLES
+        # For the usual Fortran ordered arrays these are views; any other
+        # layout of data_array is copied a tile at a time.
+        data_tile = data_array[:, first_sample:end_sample].T.reshape(-1)
+        output_tile = output_array[:, first_sample:end_sample].T
+        tile_size = data_tile.shape[0]
+        # A contiguous float64 output is computed in place, otherwise each
+        # tile is evaluated in a float64 scratch buffer so the result is
+        # only rounded to the narrower dtype once, when stored.
+        in_place = (output_array.dtype == np.float64 and
+                    output_tile.flags.c_contiguous)
+        if in_place:
+            scratch_tile = output_tile.reshape(-1)
+        else:
+            scratch_tile = scratch_array[:tile_size]
+        np.multiply(data_tile, slope_tile[:tile_size], out=scratch_tile)
+        np.add(scratch_tile, y_offset_tile[:tile_size], out=scratch_tile)
+        if not in_place:
+            output_tile[...] = scratch_tile.reshape(output_tile.shape)
+
+    return output_array
+
+
+# The CuPy kernel, built by _apply_slope_and_offset_gpu on first use
+_apply_slope_and_offset_gpu_kernel = None
+
+
+def _apply_slope_and_offset_gpu(data_array, slope, y_offset,
+                                dtype=np.float64):
+    """
+    Upload data_array to the GPU with CuPy and apply the slope and offset
+    there, returning a float64 (or dtype) cupy.ndarray that stays on the
+    device.
 
-def _remove_slope_and_offset(data_array, number_of_series, slope, y_offset):
+    Only worthwhile if the data is going to be analyzed on the GPU
+    anyway (e.g., FFTs or filtering with CuPy), since the conversion
+    itself is cheap compared to copying the float64 result back.
+    """
+    global _apply_slope_and_offset_gpu_kernel
+    # CuPy is only imported (and its kernel only built) when the GPU is
+    # actually used.
+    try:
+        import cupy
+    except ImportError:
+        raise ImportError(
+            'use_gpu=True requires CuPy to be installed') from None
+    if _apply_slope_and_offset_gpu_kernel is None:
+        _apply_slope_and_offset_gpu_kernel = cupy.ElementwiseKernel(
+            'T raw_value, float64 slope, float64 y_offset',
+            'F measured_value',
+            'measured_value = raw_value * slope + y_offset',
+            'taffmat_apply_slope_and_offset')
+
+    # Upload the int16 data (a quarter of the float64 size) in its
+    # contiguous, interleaved .dat layout and transpose on the device.
+    slope = _as_float64_vector(slope)
+    y_offset = _as_float64_vector(y_offset)
+    _check_slope_and_offset(data_array, slope, y_offset)
+    raw_data_array = cupy.asarray(np.ascontiguousarray(data_array.T)).T
+    slope = cupy.asarray(slope)[:, None]
+    y_offset = cupy.asarray(y_offset)[:, None]
+
+    measured_data_array = cupy.empty(
+        raw_data_array.shape, dtype=dtype, order='F')
+    _apply_slope_and_offset_gpu_kernel(
+        raw_data_array, slope, y_offset, measured_data_array)
+
+    return measured_data_array
+
+
+def _remove_slope_and_offset(data_array, number_of_series, slope, y_offset,
+                             out=None):
     """
     Convert data_array from float64 to int16 by removing the slope and offset
     in preparation to writing the TAFFmat .dat file
-    """
-    # FIXME: There's no reason to pass the number_of_series into this function
-    # since the data_array's first dimension tells how many series there are.
-    for series in range(0, number_of_series):
-        data_array[series] = np.around(
-            (data_array[series] - y_offset[series]) / slope[series])
 
-    data_array = data_array.astype('int16')
+    The number of series is taken from data_array, so number_of_series
+    is only kept for backwards compatibility.
 
-    return data_array
+    The returned array has shape series x num_samples, but is stored in
+    Fortran order so that its transpose is the contiguous, interleaved
+    (num_samples x series) layout of the .dat file.
+
+    If given, out is an int16 array with the same shape as data_array
+    that the raw values are written into. Otherwise a new array is
+    allocated.
+    """
+    slope = _as_float64_vector(slope)
+    y_offset = _as_float64_vector(y_offset)
+    _check_slope_and_offset(data_array, slope, y_offset)
+    _import_accelerators()
+
+    if out is None:
+        output_array = np.empty(data_array.shape, dtype=np.int16, order='F')
+    elif out.shape != data_array.shape or out.dtype != np.int16:
+        raise ValueError(
+            'out must be an int16 array with shape {shape}'.format(
+                shape=data_array.shape))
+    else:
+        output_array = out
+
+    if numba is not None:
+        _remove_slope_and_offset_kernel(
+            data_array, slope, y_offset, output_array)
+        return output_array
+
+    # Round each tile of samples in a small float64 scratch buffer and
+    # store it straight into the int16 output, so no full size float64
+    # temporary is ever allocated. As in _apply_slope_and_offset, the
+    # tiles are flat, interleaved vectors against the tiled slope and
+    # y_offset, so numpy's inner loop runs over the whole tile.
+    slope_tile = np.tile(slope, _TILE_NUM_SAMPLES)
+    y_offset_tile = np.tile(y_offset, _TILE_NUM_SAMPLES)
+    scratch_array = np.empty(slope_tile.shape, dtype=np.float64)
+    for first_sample in range(0, data_array.shape[1], _TILE_NUM_SAMPLES):
+        end_sample = first_sample + _TILE_NUM_SAMPLES
+        data_tile = data_array[:, first_sample:end_sample].T.reshape(-1)
+        output_tile = output_array[:, first_sample:end_sample].T
+        tile_size = data_tile.shape[0]
+        scratch_tile = scratch_array[:tile_size]
+        np.subtract(data_tile, y_offset_tile[:tile_size], out=scratch_tile)
+        np.divide(scratch_tile, slope_tile[:tile_size], out=scratch_tile)
+        np.rint(scratch_tile, out=scratch_tile)
+        np.copyto(output_tile, scratch_tile.reshape(output_tile.shape),
+                  casting='unsafe')
+
+    return output_array
 
 
 def _format_exponent_notation(input_number, precision, num_exponent_digits):
@@ -118,15 +443,46 @@ def _format_exponent_notation(input_number, precision, num_exponent_digits):
     [question]: http://stackoverflow.com/q/9910972/95592
     [answer]: http://stackoverflow.com/a/9911741/95592
     """
-    python_exponent_notation = '{number:.{precision}e}'.format(
-        number=input_number,
-        precision=precision)
-    mantissa, exponent = python_exponent_notation.split('e')
-    # Add 1 to the desired number of exponenent digits to account for the sign
-    return '{mantissa}e{exponent:+0{exp_num}d}'.format(
-        mantissa=mantissa,
-        exponent=int(exponent),
-        exp_num=num_exponent_digits+1)
+    # printf-style formatting takes the precision as an argument, which
+    # is cheaper than a nested format spec
+    python_exponent_notation = '%.*e' % (precision, input_number)
+    # Python always writes the exponent as a sign and at least two digits
+    # after the 'e', so only the digits need padding. inf and nan have no
+    # exponent at all.
+    exponent_index = python_exponent_notation.rfind('e')
+    if exponent_index < 0:
+        return python_exponent_notation
+    exponent_index += 2
+    return (python_exponent_notation[:exponent_index] +
+            python_exponent_notation[exponent_index:].zfill(
+                num_exponent_digits))
+
+
+def _format_exponents(input_numbers, precision, num_exponent_digits):
+    """
+    Format all of the input_numbers in exponent notation with the given
+    number of exponent digits and join them into one comma separated
+    string (e.g., for the SLOPE and Y_OFFSET lines of the .hdr file).
+    """
+    input_numbers = np.asarray(input_numbers, dtype=np.float64).tolist()
+    return ','.join(
+        _format_exponent_notation(input_number, precision, num_exponent_digits)
+        for input_number in input_numbers)
+
+
+def _parse_amp(raw_amp):
+    '''Parse a SLOTn_AMP line of the .hdr file into an _AmpInfo'''
+    id_name, num_of_channels, pld_version, firmware_version = \
+        raw_amp.split(',')[:4]
+    return _AmpInfo(id_name, num_of_channels, pld_version.strip(),
+                    firmware_version.strip())
+
+
+def _parse_channel_info(channel_num, raw_channel_info):
+    '''Parse a CHn_n line of the .hdr file into a _ChannelInfo'''
+    amp_type, range_setting, filter_setting = \
+        raw_channel_info.split(',')[:3]
+    return _ChannelInfo(channel_num, amp_type, range_setting, filter_setting)
 
 
 def _read_taffmat_hdr(input_hdr_file):
@@ -135,81 +491,43 @@ def _read_taffmat_hdr(input_hdr_file):
     all the header data.
     '''
 
-    # Read in all lines from the .hdr file
+    # Stream the header file into a dictionary using the first
+    # word of each line as the key. Lines without a space (e.g., DATA
+    # and ID_END) have no data. A repeated key (i.e., TIME) gets a 2
+    # appended. Blank lines (e.g., at the end of the file) are skipped.
+    raw_header_data = {}
     try:
         with open(input_hdr_file, 'r') as f_header:
-            header_data_all_lines = f_header.readlines()
+            for line in f_header:
+                key, _, data = line.partition(' ')
+                key = key.rstrip('\r\n')
+                if not key:
+                    continue
+                key = key.lower()
+                if key in raw_header_data:
+                    key += '2'
+                raw_header_data[key] = data.strip()
     except FileNotFoundError:
         print(f"Sorry, the .hdr file {input_hdr_file} does not exist.")
 
-    # Read the header file into an ordered dictionary using the first
-    # word of each line as the key.
-    raw_header_data = OrderedDict()
-    for line in header_data_all_lines:
-        try:
-            [key, data] = line.split(' ', 1)
-            if key != '':
-                if key.lower() in raw_header_data:
-                    raw_header_data[key.lower() + '2'] = data.strip()
-                else:
-                    raw_header_data[key.lower()] = data.strip()
-        except Exception:
-            raw_header_data[line.lower().strip()] = ''
-
     # Create a "smarter" dictionary based on the raw_header_data
-    header_data = OrderedDict()
-    header_data['dataset'] = raw_header_data['dataset']
-    header_data['version'] = int(raw_header_data['version'])
-    header_data['series_labels'] = raw_header_data['series'].split(',')
-    start_recording_datetime_as_string = (
+    raw_header_data['date_time'] = (
         raw_header_data['date'] + ' ' + raw_header_data['time'])
-    header_data['recording_start_datetime'] = datetime.strptime(
-        start_recording_datetime_as_string, '%m-%d-%Y %H:%M:%S.%f')
-    header_data['sampling_frequency_hz'] = int(raw_header_data['rate'])
-    header_data['vertical_units'] = raw_header_data['vert_units'].split(',')
-    header_data['horizontal_units'] = raw_header_data['horz_units']
-    header_data['comment'] = raw_header_data['comment']
-    header_data['number_of_series'] = int(raw_header_data['num_series'])
-    header_data['storage_mode'] = raw_header_data['storage_mode']
-    # The file_type lists how the data was recorded and saved in .dat
-    # INTEGER = 16 bit A/D = 2-byte integers
-    # LONG = 24 bit A/D = 4-byte integers
-    header_data['file_type'] = raw_header_data['file_type']
-    header_data['slope'] = [
-        float(slope) for slope in raw_header_data['slope'].split(',')]
-    header_data['x_offset'] = float(raw_header_data['x_offset'])
-    header_data['y_offset'] = [
-        float(y_offset) for y_offset in raw_header_data['y_offset'].split(',')]
-    header_data['number_of_samples'] = int(raw_header_data['num_samps'])
-    # The .hdr file will have a row containing just "DATA" to indicate
-    # that the entries here on are proprietary to the data recorder.
-    # Prior to this point, the header file was in the DADiSP format.
-    header_data['device'] = raw_header_data['device']
+    header_data = {}
+    for raw_key, key, converter in _HDR_FIELDS:
+        header_data[key] = converter(raw_header_data[raw_key])
     # FIXME: The following information is not recorded when recording to
     # a PC. Should update the reading and writing code to handle
     # that scenario.
-    slot1_amp = raw_header_data['slot1_amp'].split(',')
-    header_data['slot1_amp'] = {}
-    header_data['slot1_amp']['id_name'] = slot1_amp[0]
-    header_data['slot1_amp']['num_of_channels'] = slot1_amp[1]
-    header_data['slot1_amp']['pld_version'] = slot1_amp[2].strip()
-    header_data['slot1_amp']['firmware_version'] = slot1_amp[3].strip()
-    header_data['slot2_amp'] = {}
-    slot2_amp = raw_header_data['slot2_amp'].split(',')
-    header_data['slot2_amp']['id_name'] = slot2_amp[0]
-    header_data['slot2_amp']['num_of_channels'] = slot2_amp[1]
-    header_data['slot2_amp']['pld_version'] = slot2_amp[2].strip()
-    header_data['slot2_amp']['firmware_version'] = slot2_amp[3].strip()
-    header_data['channel_info'] = []
-    for index in range(header_data['number_of_series']):
-        raw_key = 'ch{channel_num}_{channel_num}'.format(
-            channel_num=index + 1)
-        raw_channel_info = raw_header_data[raw_key].split(',')
-        header_data['channel_info'].append({
-            'channel_num': index + 1,
-            'amp_type': raw_channel_info[0],
-            'range_setting': raw_channel_info[1],
-            'filter_setting': raw_channel_info[2]})
+    header_data['slot1_amp'] = _parse_amp(
+        raw_header_data['slot1_amp'])._asdict()
+    header_data['slot2_amp'] = _parse_amp(
+        raw_header_data['slot2_amp'])._asdict()
+    header_data['channel_info'] = [
+        _parse_channel_info(
+            channel_num,
+            raw_header_data['ch{0}_{0}'.format(channel_num)])._asdict()
+        for channel_num in range(1, header_data['number_of_series'] + 1)]
     header_data['id_num'] = int(raw_header_data['id_no'])
     start_time, end_time = raw_header_data['time2'].split(',')
     header_data['start_time'] = int(start_time)
@@ -274,8 +592,41 @@ def change_slope(data_array, series, gain):
     return data_array
 
 
+def to_physical(raw_data_array, slope, y_offset, dtype=np.float64):
+    '''Apply the slope and offset to raw ADC values
+
+    Converts the data_array returned by
+    read_taffmat(..., apply_scaling=False) into the measured values on
+    demand. A slice of its samples (e.g., raw_data_array[:, 1000:2000])
+    can be passed as-is. A subset of its series needs the matching
+    entries of slope and y_offset as well (e.g., raw_data_array[[0, 2]]
+    with slope[[0, 2]] and y_offset[[0, 2]]).
+
+    Args:
+        raw_data_array: int16 (or int32) ndarray with shape
+            series x num_samples
+        slope: Sequence of floats (e.g., header_data['slope']). One float
+            per series.
+        y_offset: Sequence of floats (e.g., header_data['y_offset']). One
+            float per series.
+        dtype: Floating point type of the returned measured values.
+
+    Returns:
+        data_array: ndarray of dtype with the same shape as
+            raw_data_array
+
+    Raises:
+        ValueError: dtype isn't a floating point type, or slope and
+            y_offset don't have one value per series.
+    '''
+    return _apply_slope_and_offset(
+        raw_data_array, raw_data_array.shape[0], slope, y_offset,
+        dtype=dtype)
+
+
 def _read_taffmat_dat(input_dat_file, file_type, number_of_series,
-                      slope, y_offset):
+                      slope, y_offset, use_memmap=True, out=None,
+                      use_gpu=False, dtype=np.float64, dat_buffer=None):
     '''Read the TAFFmat binary .dat file
 
     Args:
@@ -284,8 +635,9 @@ def _read_taffmat_dat(input_dat_file, file_type, number_of_series,
             file so we know if the data was recording in 2 or 4-bytes
         number_of_series: Integer from .hdr file stating the number of
             series recorded in the .dat file
-        slope: list of floats read from .hdr file (slope = range / 25,000).
-            One float per series. The max range of the ADC is +/-25,000
+        slope: ndarray of floats read from .hdr file
+            (slope = range / 25,000). One float per series. The max
+            range of the ADC is +/-25,000
              0.5V = 2e-5
                1V = 4e-5
                2V = 8e-5
@@ -293,12 +645,98 @@ def _read_taffmat_dat(input_dat_file, file_type, number_of_series,
               10V = 4e-4
               20V = 8e-4
               50V = 2e-3
-        y_offset: list of floats read from .hdr file. One float per
+        y_offset: ndarray of floats read from .hdr file. One float per
             series.
+        use_memmap: If True, memory map the .dat file so the OS pages
+            the data in on demand instead of reading the entire file
+            into memory before the slope and offset are applied.
+        out: Optional float64 ndarray with shape series x num_samples
+            to store the data_array in instead of allocating a new one.
+        use_gpu: If True, apply the slope and offset on the GPU with
+            CuPy and return a cupy.ndarray.
+        dtype: Floating point dtype of the returned data_array.
+        dat_buffer: Contents of the .dat file if they have already been
+            read (see _read_dat_file).
 
     Returns:
         data_array: ndarray with shape series x num_samples
 
+    Raises:
+        N/A
+    '''
+    data_array = _read_taffmat_raw_dat(
+        input_dat_file, file_type, number_of_series, use_memmap=use_memmap,
+        dat_buffer=dat_buffer)
+
+    if use_gpu:
+        if out is not None:
+            raise ValueError("out can't be used together with use_gpu")
+        return _apply_slope_and_offset_gpu(
+            data_array, slope, y_offset, dtype=dtype)
+
+    data_array = _apply_slope_and_offset(data_array,
+                                         number_of_series, slope,
+                                         y_offset, out=out, dtype=dtype)
+
+    return (data_array)
+
+
+def _read_dat_file(input_dat_file):
+    '''Read the entire .dat file into memory
+
+    The file is read unbuffered straight into a single preallocated
+    buffer, so the data isn't copied through Python's file buffer and
+    large files are read with as few system calls as possible. The GIL
+    is released while reading, so this can run in a background thread.
+
+    Args:
+        input_dat_file: Filename of the .dat file
+
+    Returns:
+        dat_buffer: bytearray with the contents of the file
+    '''
+    with open(input_dat_file, 'rb', buffering=0) as datfile:
+        file_size = os.fstat(datfile.fileno()).st_size
+        if hasattr(os, 'posix_fadvise'):
+            # The file is read front to back, so let the kernel read
+            # ahead more aggressively.
+            os.posix_fadvise(
+                datfile.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        buffer = bytearray(file_size)
+        buffer_view = memoryview(buffer)
+        bytes_read = 0
+        # A single read may return less than requested (e.g., Linux reads
+        # at most about 2 GiB at a time), so keep reading until done.
+        while bytes_read < file_size:
+            chunk_size = datfile.readinto(buffer_view[bytes_read:])
+            if not chunk_size:
+                break
+            bytes_read += chunk_size
+        buffer_view.release()
+    del buffer[bytes_read:]
+    return buffer
+
+
+def _read_taffmat_raw_dat(input_dat_file, file_type, number_of_series,
+                          use_memmap=True, dat_buffer=None):
+    '''Read the raw ADC values from the TAFFmat binary .dat file
+
+    Args:
+        input_dat_file: Filename of the .dat file
+        file_type: INTEGER or LONG as determined by reading the .hdr
+            file so we know if the data was recording in 2 or 4-bytes
+        number_of_series: Integer from .hdr file stating the number of
+            series recorded in the .dat file
+        use_memmap: If True, memory map the .dat file instead of reading
+            the entire file into memory.
+        dat_buffer: Contents of the .dat file if they have already been
+            read (see _read_dat_file). The file isn't opened again.
+
+    Returns:
+        raw_data_array: int16 (or int32) ndarray with shape
+            series x num_samples. This is a transposed view of the
+            interleaved .dat data, so no copy is made.
+
     Raises:
         N/A
     '''
@@ -311,20 +749,30 @@ def _read_taffmat_dat(input_dat_file, file_type, number_of_series,
         data_size = np.int32
     else:
         data_size = np.int16
-    # Read the entire file and reshape the data so that each channel/series
-    # is in its own row
+    # Read (or map) the entire file and reshape the data so that each
+    # channel/series is in its own row
     try:
-        with open(input_dat_file, 'rb') as datfile:
-            data_array = np.fromfile(datfile, data_size).reshape(
-                (-1, number_of_series)).T
+        data_array = None
+        if use_memmap and dat_buffer is None:
+            try:
+                data_array = np.memmap(
+                    input_dat_file, dtype=data_size, mode='r')
+            except (ValueError, OSError):
+                # Empty files can't be mapped and some file systems don't
+                # support mapping, so read those the regular way.
+                pass
+        if data_array is None:
+            if dat_buffer is None:
+                dat_buffer = _read_dat_file(input_dat_file)
+            # A trailing partial value is ignored
+            data_array = np.frombuffer(
+                dat_buffer, dtype=data_size,
+                count=len(dat_buffer) // np.dtype(data_size).itemsize)
+        data_array = data_array.reshape((-1, number_of_series)).T
     except FileNotFoundError:
         print(f"Sorry, the .dat file {input_dat_file} does not exist.")
 
-    data_array = _apply_slope_and_offset(data_array,
-                                         number_of_series, slope,
-                                         y_offset)
-
-    return (data_array)
+    return data_array
 
 
 def _write_taffmat_hdr(header_data, output_hdr_filename):
@@ -336,86 +784,39 @@ def _write_taffmat_hdr(header_data, output_hdr_filename):
 
     # Convert "smart" dictionary items into strings that are
     # ready to be saved to the .hdr text file.
-    header_output = []
-    header_output.append('DATASET {}'.format(output_hdr_filename_root.upper()))
-    header_output.append('VERSION {}'.format(header_data['version']))
-    header_output.append('SERIES ' + ','.join(
-        header_data['series_labels']) + ' ')
-    header_output.append(
-        'DATE ' + header_data['recording_start_datetime'].strftime('%m-%d-%Y'))
-    header_output.append(
-        'TIME ' +
+    header_fields = dict(header_data)
+    header_fields['dataset'] = output_hdr_filename_root.upper()
+    header_fields['series_labels'] = ','.join(header_data['series_labels'])
+    header_fields['date'] = (
+        header_data['recording_start_datetime'].strftime('%m-%d-%Y'))
+    header_fields['time'] = (
         header_data['recording_start_datetime'].strftime('%H:%M:%S.%f')[0:11])
-    header_output.append('RATE ' + str(header_data['sampling_frequency_hz']))
-    header_output.append(
-        'VERT_UNITS ' + ','.join(header_data['vertical_units']) + ' ')
-    header_output.append(
-        'HORZ_UNITS {}'.format(header_data['horizontal_units']))
-    header_output.append('COMMENT {}'.format(header_data['comment']))
-    header_output.append(
-        'NUM_SERIES {}'.format(header_data['number_of_series']))
-    header_output.append('STORAGE_MODE {}'.format(header_data['storage_mode']))
-    header_output.append('FILE_TYPE {}'.format(header_data['file_type']))
-    header_output.append(
-        'SLOPE ' + ','.join([_format_exponent_notation(slope, 6, 3)
-                            for slope in header_data['slope']]) + ' ')
-    header_output.append('X_OFFSET {:1.1f}'.format(header_data['x_offset']))
-    header_output.append(
-        'Y_OFFSET ' + ','.join([_format_exponent_notation(y_offset, 6, 3)
-                               for y_offset in header_data['y_offset']]) + ' ')
-    header_output.append('NUM_SAMPS {}'.format(
-                         header_data['number_of_samples']))
-    header_output.append('DATA')
-    header_output.append('DEVICE {}'.format(header_data['device']))
-    header_output.append('SLOT1_AMP {id},{num_ch},{pld_ver},{fw_ver}'.format(
-        id=header_data['slot1_amp']['id_name'],
-        num_ch=header_data['slot1_amp']['num_of_channels'],
-        pld_ver=header_data['slot1_amp']['pld_version'].ljust(8),
-        fw_ver=header_data['slot1_amp']['firmware_version'].ljust(8)))
-    header_output.append('SLOT2_AMP {id},{num_ch},{pld_ver},{fw_ver}'.format(
-        id=header_data['slot2_amp']['id_name'],
-        num_ch=header_data['slot2_amp']['num_of_channels'],
-        pld_ver=header_data['slot2_amp']['pld_version'].ljust(8),
-        fw_ver=header_data['slot2_amp']['firmware_version'].ljust(8)))
-    for index in range(header_data['number_of_series']):
-        channel_key = 'CH{channel_num}_{channel_num}'.format(
-            channel_num=index + 1)
-        header_output.append(
-            '{channel_key} {amp_type},{range_setting},{filter_setting}'.format(
-                channel_key=channel_key,
-                amp_type=header_data['channel_info'][index]['amp_type'],
-                range_setting=header_data[
-                    'channel_info'][index]['range_setting'],
-                filter_setting=header_data[
-                    'channel_info'][index]['filter_setting']))
-    header_output.append('ID_NO {id_num}'.format(id_num=header_data['id_num']))
-    header_output.append('TIME {start},{end}'.format(
-        start=header_data['start_time'],
-        end=header_data['stop_time']))
-    header_output.append('REC_MODE {rec_mode} '.format(
-        rec_mode=header_data['recording_destination']))
-    header_output.append('START_TRIGGER {trigger}  '.format(
-        trigger=header_data['start_trigger']))
-    header_output.append('STOP_CONDITION {condition}  '.format(
-        condition=header_data['stop_condition']))
-    header_output.append('ID_END')
+    header_fields['vertical_units'] = ','.join(header_data['vertical_units'])
+    header_fields['slope'] = _format_exponents(header_data['slope'], 6, 3)
+    header_fields['y_offset'] = _format_exponents(
+        header_data['y_offset'], 6, 3)
+    for slot in ('slot1_amp', 'slot2_amp'):
+        amp = header_data[slot]
+        header_fields[slot] = (
+            f"{amp['id_name']},{amp['num_of_channels']},"
+            f"{amp['pld_version']:<8},{amp['firmware_version']:<8}")
+    channel_info = header_data['channel_info'][
+        :header_data['number_of_series']]
+    header_fields['channel_lines'] = ''.join(
+        f"CH{channel_num}_{channel_num} {channel['amp_type']},"
+        f"{channel['range_setting']},{channel['filter_setting']}\n"
+        for channel_num, channel in enumerate(channel_info, start=1))
     if header_data['voice_memo_on']:
-        header_output.append('VOICE_MEMO {bits},{size}'.format(
-            bits=header_data['voice_memo_bits_per_sample'],
-            size=header_data['voice_memo_size_bytes']))
-    header_output.append('{model}_VERSION {ver}'.format(
-        model=header_data['recorder_model'],
-        ver=header_data['recorder_version']))
-    header_output.append('MEMO_LENGTH {memo_len}'.format(
-        memo_len=header_data['memo_length']))
-    header_output.append('MEMO {memo}'.format(memo=header_data['memo']))
-    header_output.append('')
-
-    header_output = _append_windows_newlines(header_output)
-
-    # Write the .hdr file
-    with open(output_hdr_filename, 'w') as f_header:
-        f_header.writelines(header_output)
+        header_fields['voice_memo_line'] = (
+            f"VOICE_MEMO {header_data['voice_memo_bits_per_sample']},"
+            f"{header_data['voice_memo_size_bytes']}\n")
+    else:
+        header_fields['voice_memo_line'] = ''
+
+    # Write the .hdr file. The file uses Windows style newlines, so let
+    # the text layer translate each \n into \r\n.
+    with open(output_hdr_filename, 'w', newline='\r\n') as f_header:
+        f_header.write(_HDR_TEMPLATE.format_map(header_fields))
 
     return
 
@@ -423,8 +824,7 @@ def _write_taffmat_hdr(header_data, output_hdr_filename):
 def _write_taffmat_dat(data_array, number_of_series, slope, y_offset,
                        output_dat_filename):
     '''
-    Write the .dat TAFFmat file
-    WARNING: Changes data_array in calling code!!!
+    Write the .dat TAFFmat file. data_array itself is left unchanged.
     '''
 
     # Convert data_array into int16 values by removing the offset
@@ -432,73 +832,283 @@ def _write_taffmat_dat(data_array, number_of_series, slope, y_offset,
     data_array = _remove_slope_and_offset(
         data_array, number_of_series, slope, y_offset)
 
-    # Write the binary data file.
+    # Write the binary data file. The transpose is already the contiguous,
+    # interleaved layout of the .dat file, so no copy is made here. A
+    # regular write (rather than a memory map) reports a full disk as an
+    # OSError instead of crashing the interpreter.
     with open(output_dat_filename, 'wb') as datfile:
-        data_array.T.reshape((-1, number_of_series)).tofile(datfile)
+        data_array.T.tofile(datfile)
 
     return
 
 
-def read_taffmat(input_file):
-    '''Read the TAFFmat .hdr and .dat files
-
-    Read the Teac TAFFmat text header file (.hdr) and the binary
-    data file (.dat).
+def _taffmat_filenames(input_file):
+    '''Determine the .dat and .hdr filenames and check that they exist
 
     Args:
-        input_file: Filename consisting of either just the base
-            filename or can include the .dat or .hdr suffix
+        input_file: Filename (str or os.PathLike) consisting of either
+            just the base filename or can include the .dat or .hdr suffix
 
     Returns:
-        A tuple containing the data_array (ndarray with shape
-        of series x num_samples),
-        time_vector (ndarray), and header_data (dictionary)
+        A tuple containing the .dat and .hdr filenames and the size of the
+        .dat file in bytes
 
     Raises:
-        N/A
+        FileNotFoundError: The .dat or .hdr file doesn't exist.
     '''
+    # Accept str as well as os.PathLike (e.g., pathlib.Path) filenames
+    input_file = os.fspath(input_file)
+
     # If the input_file contains the extension .dat or .hdr,
     # strip that off to create the input_file_basename
     # and then create both the .dat and .hdr filenames
     input_file_basename, input_file_extension = os.path.splitext(
         input_file)
-
-    if input_file_extension.lower() in ['.dat', '.hdr']:
-        # The input_file contained the extension of .dat or .hdr
-        input_dat_file = '{base}.DAT'.format(base=input_file_basename)
-        input_hdr_file = '{base}.HDR'.format(base=input_file_basename)
-    else:
+    if input_file_extension.lower() not in ['.dat', '.hdr']:
         # The input_file didn't contain an extension, so append .dat and .hdr
-        # TODO: Add unit tests to make sure we're properly handling
-        # input_file with .dat, .hdr, or no extension
-        input_dat_file = '{base}.DAT'.format(base=input_file)
-        input_hdr_file = '{base}.HDR'.format(base=input_file)
+        input_file_basename = input_file
+    input_dat_file = '{base}.DAT'.format(base=input_file_basename)
+    input_hdr_file = '{base}.HDR'.format(base=input_file_basename)
 
-    if (not os.path.isfile(input_dat_file) or
-            not os.path.isfile(input_hdr_file)):
+    # A single stat per file tells us that it exists, that it's a regular
+    # file and, for the .dat file, its size.
+    try:
+        dat_stat = os.stat(input_dat_file)
+        files_exist = (stat.S_ISREG(dat_stat.st_mode) and
+                       stat.S_ISREG(os.stat(input_hdr_file).st_mode))
+    except OSError:
+        files_exist = False
+    if not files_exist:
         raise FileNotFoundError("The .dat or .hdr file doesn't exist")
 
-    # Read the hdr file
-    header_data = _read_taffmat_hdr(input_hdr_file)
+    return input_dat_file, input_hdr_file, dat_stat.st_size
+
+
+class TimeVector(object):
+    '''Time of each sample, computed on demand
+
+    Sample n is taken at n / sampling_frequency_hz. Indexing returns
+    the times of just the requested samples and np.asarray() returns
+    the full time vector as a float64 ndarray.
+    '''
+
+    def __init__(self, number_of_samples, sampling_frequency_hz):
+        self.number_of_samples = number_of_samples
+        self.sampling_frequency_hz = sampling_frequency_hz
+        self.sample_period = 1.0 / sampling_frequency_hz
+
+    @property
+    def shape(self):
+        return (self.number_of_samples,)
+
+    def __len__(self):
+        return self.number_of_samples
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            sample_indices = range(self.number_of_samples)[key]
+            return np.arange(
+                sample_indices.start, sample_indices.stop,
+                sample_indices.step, dtype=np.float64) * self.sample_period
+        if isinstance(key, (int, np.integer)):
+            sample_index = range(self.number_of_samples)[key]
+            return np.float64(sample_index) * self.sample_period
+        return np.asarray(self)[key]
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError('A TimeVector is always copied into an array')
+        time_vector = np.arange(
+            self.number_of_samples, dtype=np.float64) * self.sample_period
+        if dtype is not None:
+            time_vector = time_vector.astype(dtype, copy=False)
+        return time_vector
+
+
+class TaffmatArray(object):
+    '''Raw TAFFmat ADC values with the slope and offset applied on demand
+
+    Wraps the raw (typically memory mapped) int16 data with shape
+    series x num_samples along with the per-series slope and y_offset.
+    Indexing applies the slope and offset to just the requested samples
+    and np.asarray() converts the entire array.
+
+    Attributes:
+        raw_data_array: int16 (or int32) ndarray of the raw ADC values
+        slope: float64 ndarray with one slope per series
+        y_offset: float64 ndarray with one offset per series
+    '''
+
+    def __init__(self, raw_data_array, slope, y_offset):
+        self.raw_data_array = raw_data_array
+        self.slope = _as_float64_vector(slope)
+        self.y_offset = _as_float64_vector(y_offset)
+        _check_slope_and_offset(raw_data_array, self.slope, self.y_offset)
+
+    @property
+    def shape(self):
+        return self.raw_data_array.shape
+
+    @property
+    def ndim(self):
+        return self.raw_data_array.ndim
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    def __len__(self):
+        return len(self.raw_data_array)
+
+    def __getitem__(self, key):
+        # Index zero-stride broadcasts of the slope and offset with the
+        # same key so that every selected sample gets its series' values.
+        slope = np.broadcast_to(self.slope[:, np.newaxis], self.shape)
+        y_offset = np.broadcast_to(self.y_offset[:, np.newaxis], self.shape)
+        return self.raw_data_array[key] * slope[key] + y_offset[key]
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError('A TaffmatArray is always copied into an array')
+        if dtype is None:
+            dtype = np.float64
+        return _apply_slope_and_offset(
+            self.raw_data_array, len(self.slope), self.slope, self.y_offset,
+            dtype=dtype)
+
+
+def read_taffmat(input_file, use_memmap=True, out=None, use_gpu=False,
+                 dtype=np.float64, apply_scaling=True,
+                 lazy_time_vector=False):
+    '''Read the TAFFmat .hdr and .dat files
+
+    Read the Teac TAFFmat text header file (.hdr) and the binary
+    data file (.dat).
+
+    Args:
+        input_file: Filename (str or os.PathLike) consisting of either
+            just the base filename or can include the .dat or .hdr suffix
+        use_memmap: If True (default), memory map the .dat file instead
+            of reading it into memory up front. Set to False for small
+            files or file systems that don't support memory mapping.
+        out: Optional float64 ndarray with shape series x num_samples
+            that the data_array is written into, so that a single buffer
+            can be reused when reading many equally sized files.
+        use_gpu: If True, upload the raw data to the GPU and apply the
+            slope and offset there using CuPy. The data_array is then a
+            cupy.ndarray on the device. Only useful when the following
+            analysis also runs on the GPU.
+        dtype: Floating point dtype of the data_array. Defaults to
+            float64; np.float32 halves the memory needed while staying
+            far more precise than the 16-bit ADC.
+        apply_scaling: If True (default), apply the slope and offset so
+            the data_array contains the measured values. If False,
+            return the raw int16 (or int32) ADC values from the .dat file
+            as-is; pass them with header_data['slope'] and
+            header_data['y_offset'] to to_physical to convert them
+            later. out, use_gpu and dtype only apply when apply_scaling
+            is True.
+        lazy_time_vector: If True, return the time_vector as a
+            TimeVector that only computes the times that are indexed
+            instead of allocating the full float64 time vector.
+
+    Returns:
+        A tuple containing the data_array (ndarray with shape
+        of series x num_samples, stored sample by sample like the .dat
+        file so that data_array.T is contiguous),
+        time_vector (ndarray, or TimeVector if lazy_time_vector is True),
+        and header_data (dictionary)
+
+    Raises:
+        FileNotFoundError: The .dat or .hdr file doesn't exist.
+        ImportError: use_gpu is True, but CuPy isn't installed.
+        ValueError: out doesn't match the shape of the data in the file,
+            or out and use_gpu were both given.
+    '''
+    input_dat_file, input_hdr_file, dat_file_size = _taffmat_filenames(
+        input_file)
+
+    # Read the hdr file. When the .dat file is read up front and is large,
+    # read it in the background in the meantime, so the disk is already
+    # busy while the header is being parsed.
+    dat_buffer = None
+    if not use_memmap and dat_file_size >= _BACKGROUND_READ_MIN_BYTES:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            dat_buffer_future = executor.submit(
+                _read_dat_file, input_dat_file)
+            header_data = _read_taffmat_hdr(input_hdr_file)
+            dat_buffer = dat_buffer_future.result()
+    else:
+        header_data = _read_taffmat_hdr(input_hdr_file)
 
     # Read the dat file
-    data_array = _read_taffmat_dat(
-        input_dat_file, header_data['file_type'],
-        header_data['number_of_series'],
-        header_data['slope'],
-        header_data['y_offset'])
+    if apply_scaling:
+        data_array = _read_taffmat_dat(
+            input_dat_file, header_data['file_type'],
+            header_data['number_of_series'],
+            header_data['slope'],
+            header_data['y_offset'],
+            use_memmap=use_memmap,
+            out=out,
+            use_gpu=use_gpu,
+            dtype=dtype,
+            dat_buffer=dat_buffer)
+    else:
+        data_array = _read_taffmat_raw_dat(
+            input_dat_file, header_data['file_type'],
+            header_data['number_of_series'],
+            use_memmap=use_memmap,
+            dat_buffer=dat_buffer)
 
     # Create the time vector
-    time_vector = np.linspace(
-        0,
-        (header_data['number_of_samples'] /
-            header_data['sampling_frequency_hz']),
-        header_data['number_of_samples'])
+    time_vector = TimeVector(
+        header_data['number_of_samples'],
+        header_data['sampling_frequency_hz'])
+    if not lazy_time_vector:
+        time_vector = np.asarray(time_vector)
 
     # Return a tuple
     return (data_array, time_vector, header_data)
 
 
+def read_taffmat_lazy(input_file):
+    '''Read the TAFFmat .hdr file and map the .dat file without scaling
+
+    Like read_taffmat, but neither the data_array nor the time_vector
+    are computed up front. The .dat file is memory mapped and the slope
+    and offset are only applied to the samples that are actually
+    accessed, which avoids allocating the float64 data_array for large
+    recordings.
+
+    Args:
+        input_file: Filename (str or os.PathLike) consisting of either
+            just the base filename or can include the .dat or .hdr suffix
+
+    Returns:
+        A tuple containing the data_array (TaffmatArray with shape
+        of series x num_samples),
+        time_vector (TimeVector), and header_data (dictionary)
+
+    Raises:
+        FileNotFoundError: The .dat or .hdr file doesn't exist.
+    '''
+    input_dat_file, input_hdr_file, _ = _taffmat_filenames(input_file)
+
+    header_data = _read_taffmat_hdr(input_hdr_file)
+
+    raw_data_array = _read_taffmat_raw_dat(
+        input_dat_file, header_data['file_type'],
+        header_data['number_of_series'])
+    data_array = TaffmatArray(
+        raw_data_array, header_data['slope'], header_data['y_offset'])
+
+    time_vector = TimeVector(
+        header_data['number_of_samples'],
+        header_data['sampling_frequency_hz'])
+
+    return (data_array, time_vector, header_data)
+
+
 def write_taffmat(data_array, header_data, output_base_filename):
     '''
     Write the TAFFmat .dat and .hdr files
@@ -530,13 +1140,10 @@ def write_taffmat_slice(data_array, header_data, output_base_filename,
     # TODO(mdr): Add a check to determine if the data_array is beyond
     # the range in the header.and if so log it.
 
-    # Since slices are simply views into the original array, we need
-    # to copy the array before performing the ADC conversion required
-    # by the LX-10 when storing data as integers.
-    data_array_copy = data_array.copy()
-
-    # Create copies of the originals
-    sliced_data_array = data_array_copy[
+    # The ADC conversion required by the LX-10 when storing data as
+    # integers writes into a new int16 array, so a view of the slice is
+    # all that's needed and nothing is copied.
+    sliced_data_array = data_array[
         :, starting_data_index:ending_data_index+1]
     sliced_header_data = header_data
 
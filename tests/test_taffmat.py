@@ -5,14 +5,31 @@ from __future__ import division
 from __future__ import absolute_import
 
 # Imports from the Python Standard Library
-import filecmp
+from concurrent.futures import ThreadPoolExecutor
 import os
+import pathlib
+import tempfile
+import timeit
 import unittest
+from unittest import mock
 
 # Other imports
 import numpy as np
 import taffmat
 
+# Optional imports
+try:
+    import cupy as _cupy
+except ImportError:
+    _cupy = None
+
+# Known data array of UTEST001, loaded once for the whole module. It's
+# memory mapped read-only, so the tests can share it without copying.
+_KNOWN_DATA_ARRAY = np.load(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                 'test_taffmat_files', 'utest001_data_array_float64.npy'),
+    mmap_mode='r')
+
 
 class TestPrintingExponentNotation(unittest.TestCase):
 
@@ -27,22 +44,42 @@ class TestPrintingExponentNotation(unittest.TestCase):
             '4.000000e-004', '8.000000e-004', '2.000000e-003']
         self.assertEqual(number_as_string, correct_representation)
 
+    def test_printing_exponent_notation_for_array(self):
+        numbers_to_test = np.array([0.00002, 0.0002, 0.0, -0.1, 1.5e100])
+        correct_representation = (
+            '2.000000e-005,2.000000e-004,0.000000e+000,-1.000000e-001,'
+            '1.500000e+100')
+        self.assertEqual(
+            taffmat._format_exponents(numbers_to_test, 6, 3),
+            correct_representation)
+
 
 class TestConvertingDataArray(unittest.TestCase):
 
-    def setUp(self):
-        self.given_data_array_int = np.array(
+    @classmethod
+    def setUpClass(cls):
+        # Import the optional accelerators up front, so the tests can tell
+        # which backends are available.
+        taffmat._import_accelerators()
+
+        # The given arrays are shared by all of the tests, so they're made
+        # read-only. Tests that need to change one work on a copy.
+        cls.given_data_array_int = np.array(
             [[-25000, -12500, 0, 1, 12500, 25000],
              [-25000, -12500, 0, 1, 12500, 25000]], dtype=np.int16)
-        self.number_of_series = 2
-        self.slope = [8e-05, 0.0002]
-        self.y_offset = [0.0, 0.1]
-        self.given_data_array_float = np.array(
+        cls.number_of_series = 2
+        cls.slope = (8e-05, 0.0002)
+        cls.y_offset = (0.0, 0.1)
+        cls.given_data_array_float = np.array(
             [[-2.0, -1.0, 0.0, 0.00008, 1.0, 2.0],
              [-4.9, -2.4, 0.1, 0.1002, 2.6, 5.1]], dtype=np.float64)
-        self.given_data_array_new_slope = np.array(
+        cls.given_data_array_new_slope = np.array(
             [[-1.0, -0.5, 0.0, 0.00004, 0.5, 1.0],
              [-4.9, -2.4, 0.1, 0.1002, 2.6, 5.1]], dtype=np.float64)
+        for given_data_array in (cls.given_data_array_int,
+                                 cls.given_data_array_float,
+                                 cls.given_data_array_new_slope):
+            given_data_array.setflags(write=False)
 
     def test_converting_data_array_from_int_to_float(self):
         data_array_float = taffmat._apply_slope_and_offset(
@@ -60,9 +97,36 @@ class TestConvertingDataArray(unittest.TestCase):
             data_array_int, self.given_data_array_int,
             'Failed removing slope and offset')
 
+    def test_converting_data_array_from_float_to_int_leaves_input(self):
+        data_array_float = self.given_data_array_float.copy()
+        taffmat._remove_slope_and_offset(
+            data_array_float, self.number_of_series,
+            self.slope, self.y_offset)
+        np.testing.assert_array_equal(
+            data_array_float, self.given_data_array_float,
+            'Removing slope and offset changed the float data_array')
+
+    def test_converted_int_data_array_is_interleaved(self):
+        data_array_int = taffmat._remove_slope_and_offset(
+            self.given_data_array_float, self.number_of_series,
+            self.slope, self.y_offset)
+        self.assertTrue(
+            data_array_int.T.flags['C_CONTIGUOUS'],
+            'Transpose of int data_array is not in the .dat file layout')
+
+    def test_converting_data_array_from_float_to_int_into_out(self):
+        interleaved_array = np.empty((6, 2), dtype=np.int16)
+        taffmat._remove_slope_and_offset(
+            self.given_data_array_float, self.number_of_series,
+            self.slope, self.y_offset, out=interleaved_array.T)
+        np.testing.assert_array_equal(
+            interleaved_array.T, self.given_data_array_int,
+            'Failed removing slope and offset into out')
+
     def test_changing_slope(self):
+        data_array_float = self.given_data_array_float.copy()
         data_array_new_slope = taffmat.change_slope(
-            self.given_data_array_float,
+            data_array_float,
             0,
             0.5)
         np.testing.assert_array_equal(
@@ -70,9 +134,124 @@ class TestConvertingDataArray(unittest.TestCase):
             self.given_data_array_new_slope,
             'Failed applying 1/2 gain to slope of series 0')
         np.testing.assert_array_equal(
-            self.given_data_array_float,
+            data_array_float,
             self.given_data_array_new_slope)
 
+    def test_converting_data_array_with_each_backend(self):
+        # Every backend (numba or plain numpy) has to give
+        # bit-identical results, so that .dat files round trip exactly.
+        # The array spans several tiles, with a partial tile at the end.
+        raw_data_array = np.random.RandomState(0).randint(
+            -25000, 25001, size=(20000, 3)).astype(np.int16).T
+        slope = [8e-05, 0.0002, 4e-04]
+        y_offset = [0.0, 0.1, -0.25]
+        known_data_array_float = (
+            raw_data_array * np.array(slope)[:, np.newaxis] +
+            np.array(y_offset)[:, np.newaxis])
+        backends = [('numpy', None)]
+        if taffmat.numba is not None:
+            backends.append(('numba', taffmat.numba))
+        for backend, numba_module in backends:
+            with self.subTest(backend=backend), \
+                    mock.patch.object(taffmat, 'numba', numba_module):
+                data_array_float = taffmat._apply_slope_and_offset(
+                    raw_data_array, 3, slope, y_offset)
+                np.testing.assert_array_equal(
+                    data_array_float, known_data_array_float)
+                data_array_int = taffmat._remove_slope_and_offset(
+                    data_array_float, 3, slope, y_offset)
+                np.testing.assert_array_equal(data_array_int, raw_data_array)
+                # Arrays that aren't stored sample by sample are converted
+                # the same
+                np.testing.assert_array_equal(
+                    taffmat._apply_slope_and_offset(
+                        np.ascontiguousarray(raw_data_array), 3,
+                        slope, y_offset),
+                    known_data_array_float)
+
+    def test_converting_data_array_with_too_few_slopes(self):
+        for backend, numba_module in (('numpy', None),
+                                      ('default', taffmat.numba)):
+            with self.subTest(backend=backend), \
+                    mock.patch.object(taffmat, 'numba', numba_module):
+                with self.assertRaises(ValueError):
+                    taffmat._apply_slope_and_offset(
+                        self.given_data_array_int, self.number_of_series,
+                        self.slope[:1], self.y_offset)
+                with self.assertRaises(ValueError):
+                    taffmat._remove_slope_and_offset(
+                        self.given_data_array_float, self.number_of_series,
+                        self.slope, self.y_offset[:1])
+
+    def test_converting_data_array_from_several_threads(self):
+        raw_data_array = np.tile(self.given_data_array_int, 10000)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            data_arrays_float = list(executor.map(
+                lambda _: taffmat.to_physical(
+                    raw_data_array, self.slope, self.y_offset),
+                range(16)))
+        for data_array_float in data_arrays_float:
+            np.testing.assert_array_equal(
+                data_array_float, data_arrays_float[0],
+                'Converting from several threads gave different results')
+
+
+class TestConversionSpeed(unittest.TestCase):
+    """
+    numba is optional, so the plain numpy conversion is what most installs
+    run. Check that it is no slower than the original per-series loop on
+    the real UTEST001 file (2 series, 1.25M samples), where it is about
+    1.5x faster.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.raw_data_array, _, header_data = taffmat.read_taffmat(
+            os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                         'test_taffmat_files', 'UTEST001'),
+            apply_scaling=False)
+        cls.slope = header_data['slope']
+        cls.y_offset = header_data['y_offset']
+        cls.data_array = taffmat.to_physical(
+            cls.raw_data_array, cls.slope, cls.y_offset)
+
+    def assertNotSlower(self, function, per_series_function):
+        with mock.patch.object(taffmat, 'numba', None):
+            duration = min(timeit.repeat(function, number=3, repeat=5))
+        per_series_duration = min(
+            timeit.repeat(per_series_function, number=3, repeat=5))
+        self.assertLess(
+            duration, per_series_duration,
+            'numpy conversion is slower than the per-series loop')
+
+    def test_applying_slope_and_offset_is_not_slower(self):
+        def per_series_loop():
+            data_array = self.raw_data_array.astype(np.float64)
+            for series in range(data_array.shape[0]):
+                data_array[series] = (data_array[series] * self.slope[series] +
+                                      self.y_offset[series])
+
+        self.assertNotSlower(
+            lambda: taffmat._apply_slope_and_offset(
+                self.raw_data_array, 2, self.slope, self.y_offset),
+            per_series_loop)
+
+    def test_removing_slope_and_offset_is_not_slower(self):
+        def per_series_loop():
+            # The original loop rounded the caller's array in place, so
+            # it works on a copy here to be repeatable.
+            data_array = self.data_array.copy()
+            for series in range(data_array.shape[0]):
+                data_array[series] = np.around(
+                    (data_array[series] - self.y_offset[series]) /
+                    self.slope[series])
+            data_array.astype(np.int16)
+
+        self.assertNotSlower(
+            lambda: taffmat._remove_slope_and_offset(
+                self.data_array, 2, self.slope, self.y_offset),
+            per_series_loop)
+
 
 class TestInputFilenames(unittest.TestCase):
 
@@ -81,9 +260,7 @@ class TestInputFilenames(unittest.TestCase):
             os.path.dirname(os.path.realpath(__file__)),
             'test_taffmat_files')
 
-        known_data_array_input_file = os.path.join(
-            self.test_taffmat_directory, 'utest001_data_array_float64.npy')
-        self.known_data_array = np.load(known_data_array_input_file)
+        self.known_data_array = _KNOWN_DATA_ARRAY
 
     def test_nonexistent_input_file(self):
         # Read in the TAFFmat file under test
@@ -115,33 +292,149 @@ class TestInputFilenames(unittest.TestCase):
             data_array, self.known_data_array,
             'Incorrectly read data_array using filename without an extension')
 
+    def test_input_file_into_preallocated_array(self):
+        # Read in the TAFFmat file under test
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        out = np.empty_like(self.known_data_array)
+        data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename, out=out)
+        self.assertIs(data_array, out)
+        np.testing.assert_array_equal(
+            data_array, self.known_data_array,
+            'Incorrectly read data_array into a preallocated array')
+
+    def test_input_file_as_float32(self):
+        # Read in the TAFFmat file under test
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename, dtype=np.float32)
+        self.assertEqual(data_array.dtype, np.float32)
+        np.testing.assert_array_equal(
+            data_array, self.known_data_array.astype(np.float32),
+            'Incorrectly read data_array as float32')
+
+    def test_input_file_without_scaling(self):
+        # Read in the TAFFmat file under test
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        raw_data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename, apply_scaling=False)
+        self.assertEqual(raw_data_array.dtype, np.int16)
+        np.testing.assert_array_equal(
+            raw_data_array * header_data['slope'][:, np.newaxis] +
+            header_data['y_offset'][:, np.newaxis],
+            self.known_data_array,
+            'Incorrectly read raw data_array')
+        np.testing.assert_array_equal(
+            taffmat.to_physical(
+                raw_data_array, header_data['slope'],
+                header_data['y_offset']),
+            self.known_data_array,
+            'Incorrectly converted raw data_array')
+
+    @unittest.skipIf(_cupy is None, 'CuPy is not installed')
+    def test_input_file_on_gpu(self):
+        # Read in the TAFFmat file under test
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename, use_gpu=True)
+        np.testing.assert_array_almost_equal(
+            _cupy.asnumpy(data_array), self.known_data_array,
+            decimal=12,
+            err_msg='Incorrectly read data_array on the GPU')
+
+    @unittest.skipIf(_cupy is not None, 'CuPy is installed')
+    def test_input_file_on_gpu_without_cupy(self):
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        with self.assertRaises(ImportError):
+            taffmat.read_taffmat(input_file_basename, use_gpu=True)
+
+    def test_input_file_as_path_object(self):
+        # Read in the TAFFmat file under test
+        input_file_basename = pathlib.Path(
+            self.test_taffmat_directory, 'UTEST001.HDR')
+        data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename)
+        np.testing.assert_array_equal(
+            data_array, self.known_data_array,
+            'Incorrectly read data_array using a pathlib.Path filename')
+
+    def test_input_file_with_lazy_time_vector(self):
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename, lazy_time_vector=True)
+        self.assertIsInstance(time_vector, taffmat.TimeVector)
+        np.testing.assert_array_equal(
+            np.asarray(time_vector),
+            taffmat.read_taffmat(input_file_basename)[1],
+            'Lazy time_vector does not match the time_vector')
+
+    def test_input_file_without_memmap(self):
+        # Read in the TAFFmat file under test
+        input_file_basename = os.path.join(
+            self.test_taffmat_directory,
+            'UTEST001')
+        data_array, time_vector, header_data = \
+            taffmat.read_taffmat(input_file_basename, use_memmap=False)
+        np.testing.assert_array_equal(
+            data_array, self.known_data_array,
+            'Incorrectly read data_array without memory mapping the .dat')
+
+    def test_input_file_with_empty_dat_file(self):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            input_file_basename = os.path.join(temp_directory, 'EMPTY')
+            with open(input_file_basename + '.DAT', 'wb'):
+                pass
+            source_hdr = os.path.join(
+                self.test_taffmat_directory, 'UTEST001.HDR')
+            with open(source_hdr, 'rb') as hdr_source_file:
+                hdr_contents = hdr_source_file.read().replace(
+                    b'NUM_SAMPS 1249792', b'NUM_SAMPS 0')
+            with open(input_file_basename + '.HDR', 'wb') as hdr_file:
+                hdr_file.write(hdr_contents)
+            data_array, time_vector, header_data = \
+                taffmat.read_taffmat(input_file_basename)
+        self.assertEqual(data_array.shape, (2, 0))
+        self.assertEqual(time_vector.shape, (0,))
+
 
 class TestReadingTAFFmatFile(unittest.TestCase):
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         test_taffmat_directory = os.path.join(
             os.path.dirname(os.path.realpath(__file__)),
             'test_taffmat_files')
 
-        # Read in the TAFFmat file under test
+        # Read in the TAFFmat file under test once for all of the tests,
+        # which only look at (and never change) the result.
         input_file_basename = os.path.join(
             test_taffmat_directory, 'UTEST001')
-        self.data_array, self.time_vector, self.header_data = \
+        cls.data_array, cls.time_vector, cls.header_data = \
             taffmat.read_taffmat(input_file_basename)
-        self.beginning_of_raw_data_array = np.array(
+        cls.beginning_of_raw_data_array = np.array(
             [2959, 6291, 9386, 12121], dtype=np.int16)
 
-        # Read in the known data array and provide the answers
-        # for the header file. By having this setup here, we can
-        # change to a different test file by simply updating
-        # this section instead of searching all through the test code
-        known_data_array_input_file = os.path.join(
-            test_taffmat_directory, 'utest001_data_array_float64.npy')
-        self.known_data_array = np.load(known_data_array_input_file)
-        self.known_header = {}
-        self.known_header['sampling_frequency_hz'] = 96000
-        self.known_header['number_of_series'] = 2
-        self.known_header['slope'] = [8e-05, 0.0002]
+        # Provide the known data array and the answers for the header
+        # file. By having this setup here, we can change to a different
+        # test file by simply updating this section instead of searching
+        # all through the test code
+        cls.known_data_array = _KNOWN_DATA_ARRAY
+        cls.known_header = {}
+        cls.known_header['sampling_frequency_hz'] = 96000
+        cls.known_header['number_of_series'] = 2
+        cls.known_header['slope'] = [8e-05, 0.0002]
 
     def test_sampling_frequency(self):
         self.assertEqual(
@@ -172,6 +465,13 @@ class TestReadingTAFFmatFile(unittest.TestCase):
             self.time_vector.shape[0],
             'Incorrect number of samples in time_vector')
 
+    def test_time_vector_sample_spacing(self):
+        np.testing.assert_allclose(
+            np.diff(self.time_vector),
+            1.0 / self.header_data['sampling_frequency_hz'],
+            err_msg='time_vector is not spaced at the sampling period')
+        self.assertEqual(self.time_vector[0], 0.0)
+
     def test_number_of_series(self):
         self.assertEqual(
             self.header_data['number_of_series'],
@@ -184,12 +484,35 @@ class TestReadingTAFFmatFile(unittest.TestCase):
             self.known_header['slope'][0],
             'Incorrect slope for channel 1')
 
+    def test_header_data_is_in_hdr_file_order(self):
+        self.assertEqual(
+            list(self.header_data)[:16],
+            ['dataset', 'version', 'series_labels',
+             'recording_start_datetime', 'sampling_frequency_hz',
+             'vertical_units', 'horizontal_units', 'comment',
+             'number_of_series', 'storage_mode', 'file_type', 'slope',
+             'x_offset', 'y_offset', 'number_of_samples', 'device'],
+            'header_data fields are not in the order of the .hdr file')
+
+    def test_slope_and_y_offset_are_float64_arrays(self):
+        for key in ('slope', 'y_offset'):
+            self.assertIsInstance(self.header_data[key], np.ndarray)
+            self.assertEqual(self.header_data[key].dtype, np.float64)
+            self.assertEqual(
+                self.header_data[key].shape,
+                (self.header_data['number_of_series'],))
+
     def test_data_array_was_read_correctly(self):
         np.testing.assert_array_equal(
             self.data_array,
             self.known_data_array,
             'data_array was not read correctly')
 
+    def test_data_array_is_stored_sample_by_sample(self):
+        self.assertTrue(
+            self.data_array.T.flags['C_CONTIGUOUS'],
+            'data_array is not stored in the .dat file layout')
+
     def test_data_conversion_from_int_to_float(self):
         self.assertAlmostEqual(
             self.data_array[0, 0],
@@ -198,33 +521,78 @@ class TestReadingTAFFmatFile(unittest.TestCase):
             msg='Incorrect conversion from int16 data to float')
 
 
-class TestWritingTAFFmatFile(unittest.TestCase):
+class TestReadingTAFFmatFileLazily(unittest.TestCase):
 
-    def setUp(self):
-        self.test_taffmat_directory = os.path.join(
+    @classmethod
+    def setUpClass(cls):
+        test_taffmat_directory = os.path.join(
             os.path.dirname(os.path.realpath(__file__)),
             'test_taffmat_files')
 
         # Read in the TAFFmat file under test
-        self.input_base_filename = os.path.join(
-            self.test_taffmat_directory, 'UTEST001')
-        self.data_array, self.time_vector, self.header_data = \
-            taffmat.read_taffmat(self.input_base_filename)
+        input_file_basename = os.path.join(
+            test_taffmat_directory, 'UTEST001')
+        cls.data_array, cls.time_vector, cls.header_data = \
+            taffmat.read_taffmat_lazy(input_file_basename)
+        cls.known_data_array, cls.known_time_vector, _ = \
+            taffmat.read_taffmat(input_file_basename)
+
+    def test_lazy_data_array_conversion(self):
+        self.assertEqual(self.data_array.shape, self.known_data_array.shape)
+        np.testing.assert_array_equal(
+            np.asarray(self.data_array),
+            self.known_data_array,
+            'Lazy data_array was not converted correctly')
 
-        # Setup the output_basefilename
-        self.output_base_filename = os.path.join(
-            self.test_taffmat_directory, 'test_output_taffmat')
+    def test_lazy_data_array_indexing(self):
+        np.testing.assert_array_equal(
+            self.data_array[:, 1000:2000:3],
+            self.known_data_array[:, 1000:2000:3],
+            'Slice of lazy data_array was not converted correctly')
+        self.assertEqual(
+            self.data_array[1, -1], self.known_data_array[1, -1])
+
+    def test_lazy_time_vector(self):
+        self.assertEqual(len(self.time_vector), len(self.known_time_vector))
+        np.testing.assert_array_equal(
+            np.asarray(self.time_vector), self.known_time_vector)
+        np.testing.assert_array_equal(
+            self.time_vector[5:-5:7], self.known_time_vector[5:-5:7])
+        self.assertEqual(self.time_vector[-1], self.known_time_vector[-1])
+
+
+class TestWritingTAFFmatFile(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_taffmat_directory = os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            'test_taffmat_files')
 
-        # Write the .dat and .hdr files using taffmat.py
+        # Read in the TAFFmat file under test
+        cls.input_base_filename = os.path.join(
+            cls.test_taffmat_directory, 'UTEST001')
+        cls.data_array, cls.time_vector, cls.header_data = \
+            taffmat.read_taffmat(cls.input_base_filename)
+
+        # Setup the output_basefilename. The process id keeps the output
+        # of test runs in parallel processes apart.
+        cls.output_base_filename = os.path.join(
+            cls.test_taffmat_directory,
+            'test_output_taffmat_{pid}'.format(pid=os.getpid()))
+
+        # Write the .dat and .hdr files using taffmat.py once. The tests
+        # only compare the written files.
         taffmat.write_taffmat(
-            self.data_array, self.header_data, self.output_base_filename)
+            cls.data_array, cls.header_data, cls.output_base_filename)
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         # Need to delete the test output file
         output_dat_filename = '{base}.DAT'.format(
-            base=self.output_base_filename)
+            base=cls.output_base_filename)
         output_hdr_filename = '{base}.HDR'.format(
-            base=self.output_base_filename)
+            base=cls.output_base_filename)
         try:
             os.remove(output_dat_filename)
         except OSError as error:
@@ -247,7 +615,14 @@ class TestWritingTAFFmatFile(unittest.TestCase):
             self.input_base_filename)
         output_dat, output_hdr = self._get_dat_hdr_filenames_from_base(
             self.output_base_filename)
-        data_files_equal = filecmp.cmp(source_dat, output_dat, shallow=False)
+        # Compare the files in place through read-only memory maps
+        # instead of reading them into memory.
+        self.assertEqual(
+            os.path.getsize(source_dat), os.path.getsize(output_dat),
+            'Saved dat file size does not equal source dat file size.')
+        data_files_equal = np.array_equal(
+            np.memmap(source_dat, dtype=np.int16, mode='r'),
+            np.memmap(output_dat, dtype=np.int16, mode='r'))
         self.assertTrue(
             data_files_equal,
             'Saved dat file does not equal source dat file.')
@@ -257,19 +632,45 @@ class TestWritingTAFFmatFile(unittest.TestCase):
             self.input_base_filename)
         output_dat, output_hdr = self._get_dat_hdr_filenames_from_base(
             self.output_base_filename)
+        # Compare the stripped, non-blank lines. The first line holds the
+        # DATASET, which is the (different) output filename.
         with open(source_hdr, 'r') as hdr_source_file:
-            source_hdr_contents = hdr_source_file.read().split('\r\n')
+            source_hdr_contents_no_whitespace = [
+                line.strip() for line in hdr_source_file.read().splitlines()
+                if line.strip()]
         with open(output_hdr, 'r') as hdr_output_file:
-            output_hdr_contents = hdr_output_file.read().split('\r\n')
-        source_hdr_contents_no_whitespace = \
-            [s.strip() for s in source_hdr_contents]
-        output_hdr_contents_no_whitespace = \
-            [s.strip() for s in output_hdr_contents]
+            output_hdr_contents_no_whitespace = [
+                line.strip() for line in hdr_output_file.read().splitlines()
+                if line.strip()]
         self.assertEqual(source_hdr_contents_no_whitespace[1:],
                          output_hdr_contents_no_whitespace[1:])
+        self.assertGreater(len(source_hdr_contents_no_whitespace), 1)
+
+    def test_writing_header_file_with_windows_newlines(self):
+        output_dat, output_hdr = self._get_dat_hdr_filenames_from_base(
+            self.output_base_filename)
+        with open(output_hdr, 'rb') as hdr_output_file:
+            output_hdr_contents = hdr_output_file.read()
+        self.assertTrue(output_hdr_contents.endswith(b'\r\n'))
+        self.assertNotIn(b'\r\r\n', output_hdr_contents)
+        self.assertEqual(
+            output_hdr_contents.count(b'\n'),
+            output_hdr_contents.count(b'\r\n'),
+            'Not every line of the .hdr file ends with a Windows newline')
+
+    @unittest.skipUnless(os.path.exists('/dev/full'), 'needs /dev/full')
+    def test_writing_data_array_to_full_disk(self):
+        # Writes to /dev/full always fail with ENOSPC, which has to come
+        # back as an exception instead of crashing the interpreter.
+        with self.assertRaises(OSError):
+            taffmat._write_taffmat_dat(
+                self.data_array, self.header_data['number_of_series'],
+                self.header_data['slope'], self.header_data['y_offset'],
+                '/dev/full')
 
     def test_writing_different_dataset_filename(self):
-        new_output_base_filename = 'something_different'
+        new_output_base_filename = 'something_different_{pid}'.format(
+            pid=os.getpid())
         taffmat.write_taffmat(self.data_array,
                               self.header_data,
                               new_output_base_filename)
@@ -294,16 +695,34 @@ class TestWritingTAFFmatFile(unittest.TestCase):
 
 class TestWritingTAFFmatFileSlice(unittest.TestCase):
 
-    def setUp(self):
-        self.test_taffmat_directory = os.path.join(
+    @classmethod
+    def setUpClass(cls):
+        cls.test_taffmat_directory = os.path.join(
             os.path.dirname(os.path.realpath(__file__)),
             'test_taffmat_files')
 
-        # Read in the TAFFmat file under test
-        self.input_base_filename = os.path.join(
-            self.test_taffmat_directory, 'UTEST001')
-        self.data_array, self.time_vector, self.header_data = \
-            taffmat.read_taffmat(self.input_base_filename)
+        # Read in the TAFFmat file under test. write_taffmat_slice updates
+        # the header_data it's given, so the tests pass it a copy.
+        cls.input_base_filename = os.path.join(
+            cls.test_taffmat_directory, 'UTEST001')
+        cls.data_array, cls.time_vector, cls.header_data = \
+            taffmat.read_taffmat(cls.input_base_filename)
+
+        # The process id keeps the output of test runs in parallel
+        # processes apart.
+        cls.slice_output_base_filename = os.path.join(
+            cls.test_taffmat_directory,
+            'test_slice_output_taffmat_{pid}'.format(pid=os.getpid()))
+
+    @classmethod
+    def tearDownClass(cls):
+        # Need to delete the test output files
+        for extension in ('.DAT', '.HDR'):
+            try:
+                os.remove(cls.slice_output_base_filename + extension)
+            except OSError as error:
+                print(error)
+                print("Couldn't remove the test slice output file.")
 
     def test_writing_dat_file_slice(self):
         '''
@@ -312,8 +731,7 @@ class TestWritingTAFFmatFileSlice(unittest.TestCase):
         1000 elements of the original data_array
         '''
 
-        slice_output_base_filename = os.path.join(
-            self.test_taffmat_directory, 'test_slice_output_taffmat')
+        slice_output_base_filename = self.slice_output_base_filename
 
         # number_of_samples_in_slice = self.data_array.shape[1]
         number_of_samples_in_slice = 1000
@@ -322,7 +740,7 @@ class TestWritingTAFFmatFileSlice(unittest.TestCase):
 
         # Write the TAFFmat data slice
         taffmat.write_taffmat_slice(
-            self.data_array, self.header_data,
+            self.data_array, dict(self.header_data),
             slice_output_base_filename, 0, number_of_samples_in_slice-1)
 
         # Read the TAFFmat data slice
@@ -340,6 +758,18 @@ class TestWritingTAFFmatFileSlice(unittest.TestCase):
             original_data_array,
             'The sliced data array does not equal the original data array.')
 
+    def test_writing_dat_file_slice_leaves_data_array_unchanged(self):
+        slice_output_base_filename = self.slice_output_base_filename
+        original_data_array = self.data_array.copy()
+
+        taffmat.write_taffmat_slice(
+            self.data_array, dict(self.header_data),
+            slice_output_base_filename, 10, 1009)
+
+        np.testing.assert_array_equal(
+            self.data_array, original_data_array,
+            'Writing a slice changed the original data array.')
+
 
 if __name__ == '__main__':
     unittest.main()